@@ -1,13 +1,14 @@
-from enum import Enum
-from typing import Callable
+from typing import Any, Callable, Optional
 import math
+import operator
 
 
 # Tokenizer
 letters = set(list("abcdefghijklmnopqrstuvwxyz"))
 numbers = set(list("0123456789."))
 
-class TokenType(Enum):
+# Plain ints rather than an Enum, they're compared for every token and node
+class TokenType:
   LPAREN = 1
   RPAREN = 2
   LCURLY = 3
@@ -17,7 +18,9 @@ class TokenType(Enum):
   OPERATOR = 7
 
 class Token:
-  type: TokenType
+  __slots__ = ("type", "value")
+
+  type: int
   value: str
 
   def __init__(self, type, value):
@@ -27,163 +30,343 @@ class Token:
   def __repr__(self) -> str:
     return f"Token({self.type}, {self.value})"
 
+symbols: dict[str, tuple[int, str]] = {
+  "(": (TokenType.LPAREN, "("),
+  ")": (TokenType.RPAREN, ")"),
+  "{": (TokenType.LCURLY, "{"),
+  "}": (TokenType.RCURLY, "}"),
+  "+": (TokenType.OPERATOR, "+"),
+  "-": (TokenType.OPERATOR, "-"),
+  "*": (TokenType.OPERATOR, "*"),
+  "/": (TokenType.OPERATOR, "/"),
+  "=": (TokenType.OPERATOR, "="),
+  "^": (TokenType.OPERATOR, "^"),
+}
+
 def tokenize(code: str) -> list[Token]:
   tokens = []
-  while len(code) > 0:
-    char = code[0]
-    if char == "(":
-      tokens.append(Token(TokenType.LPAREN, "("))
-      code = code[1:]
-    elif char == ")":
-      tokens.append(Token(TokenType.RPAREN, ")"))
-      code = code[1:]
-    elif char == "{":
-      tokens.append(Token(TokenType.LCURLY, "{"))
-      code = code[1:]
-    elif char == "}":
-      tokens.append(Token(TokenType.RCURLY, "}"))
-      code = code[1:]
-    elif char == "+":
-      tokens.append(Token(TokenType.OPERATOR, "+"))
-      code = code[1:]
-    elif char == "-":
-      tokens.append(Token(TokenType.OPERATOR, "-"))
-      code = code[1:]
-    elif char == "*":
-      tokens.append(Token(TokenType.OPERATOR, "*"))
-      code = code[1:]
-    elif char == "/":
-      tokens.append(Token(TokenType.OPERATOR, "/"))
-      code = code[1:]
-    elif char == "=":
-      tokens.append(Token(TokenType.OPERATOR, "="))
-      code = code[1:]
-    elif char == "^":
-      tokens.append(Token(TokenType.OPERATOR, "^"))
-      code = code[1:]
+  i = 0
+  n = len(code)
+  while i < n:
+    char = code[i]
+    symbol = symbols.get(char)
+    if symbol is not None:
+      tokens.append(Token(*symbol))
+      i += 1
     elif char == " ":
-      code = code[1:]
+      i += 1
     elif char in letters:
-      ident, code = get_ident(code)
+      (ident, i) = get_ident(code, i)
       tokens.append(Token(TokenType.IDENT, ident))
     elif char in numbers:
-      (num, code) = get_num(code)
+      (num, i) = get_num(code, i)
       tokens.append(Token(TokenType.NUMBER, num))
     else:
       raise SyntaxError("unknown character: " + char)
 
   return tokens
 
-def get_ident(code: str) -> tuple[str, str]:
-  out = ""
-  while (code[0]) in letters:
-    out += code[0]
-    code = code[1:]
-    if len(code) == 0:
-      return (out, code)
-  return (out, code)
-
-def get_num(code: str) -> tuple[str, str]:
-  out = ""
-  while (code[0]) in numbers:
-    out += code[0]
-    code = code[1:]
-    if len(code) == 0:
-      return (out, code)
-  return (out, code)
+def get_ident(code: str, i: int) -> tuple[str, int]:
+  j = i
+  n = len(code)
+  while j < n and code[j] in letters:
+    j += 1
+  return (code[i:j], j)
+
+def get_num(code: str, i: int) -> tuple[str, int]:
+  j = i
+  n = len(code)
+  while j < n and code[j] in numbers:
+    j += 1
+  return (code[i:j], j)
+
+# Functions, with how many parameters they take
+functions: dict[str, tuple[int, Callable[..., float]]] = {
+  "sqrt": (1, math.sqrt),
+  "sin": (1, math.sin),
+  "cos": (1, math.cos),
+  "tan": (1, math.tan),
+  "fact": (1, lambda x: math.gamma(x) * x),
+}
 
 # Parser
-class NodeType(Enum):
+class NodeType:
   NUMBER = 1
   VARIABLE = 2
   EXPR = 3
   CALL = 4
 
-class Node:
-  type: NodeType
-  value: any
-
-  def __init__(self, type, value):
-    self.type = type
-    self.value = value
-
-  def __repr__(self) -> str:
-    return f"Node({self.type}, {self.value})"
+# The tree is stored as parallel lists indexed by node id. A node is only added after its children,
+# so ids are in postorder and every child has a smaller id than its parent
+class Ast:
+  __slots__ = ("types", "consts", "names", "ops", "lefts", "rights", "fns", "params")
+
+  def __init__(self):
+    self.types: list[int] = []
+    self.consts: list[float] = [] # NUMBER
+    self.names: list[str] = [] # VARIABLE
+    self.ops: list[Optional[Callable[[float, float], float]]] = [] # EXPR
+    self.lefts: list[int] = [] # EXPR
+    self.rights: list[int] = [] # EXPR
+    self.fns: list[Optional[Callable[..., float]]] = [] # CALL
+    self.params: list[Optional[list[int]]] = [] # CALL
+
+  def emit(self, type: int, const: float = 0.0, name: str = "", op: Optional[Callable[[float, float], float]] = None, left: int = -1, right: int = -1, fn: Optional[Callable[..., float]] = None, params: Optional[list[int]] = None) -> int:
+    self.types.append(type)
+    self.consts.append(const)
+    self.names.append(name)
+    self.ops.append(op)
+    self.lefts.append(left)
+    self.rights.append(right)
+    self.fns.append(fn)
+    self.params.append(params)
+    return len(self.types) - 1
+
+# Operators and functions are looked up once while parsing, the tree stores the function
+operators: dict[str, Callable[[float, float], float]] = {
+  "+": operator.add,
+  "-": operator.sub,
+  "*": operator.mul,
+  "/": operator.truediv,
+  "^": operator.pow,
+}
 
-def parse(tokens: list[Token]) -> tuple[list[Token], Node]:
+def parse(tokens: list[Token], ast: Ast) -> tuple[list[Token], int]:
   tok = tokens[0]
   if tok.type == TokenType.IDENT:
-    return tokens[1:], Node(NodeType.VARIABLE, tok.value)
+    return tokens[1:], ast.emit(NodeType.VARIABLE, name=tok.value)
 
   elif tok.type == TokenType.NUMBER:
-    return tokens[1:], Node(NodeType.NUMBER, float(tok.value))
+    return tokens[1:], ast.emit(NodeType.NUMBER, const=float(tok.value))
 
   elif tok.type == TokenType.LPAREN:
-    (tokens, val) = parse(tokens[1:])
+    (tokens, val) = parse(tokens[1:], ast)
     tok = tokens[0]
     while tok.type != TokenType.RPAREN:
-      op = tok.value
-      (tokens, right) = parse(tokens[1:])
-      val = Node(NodeType.EXPR, (op, val, right))
+      op = operators.get(tok.value)
+      if op is None:
+        raise SyntaxError("unknown operator: " + tok.value)
+      (tokens, right) = parse(tokens[1:], ast)
+      val = ast.emit(NodeType.EXPR, op=op, left=val, right=right)
       tok = tokens[0]
     return tokens[1:], val
 
   elif tok.type == TokenType.LCURLY:
     tokens = tokens[1:]
     fn_name = tokens[0].value
+    if fn_name not in functions:
+      raise NameError("unknown function: " + fn_name)
+    (arity, fn) = functions[fn_name]
     tokens = tokens[1:]
-    params: list[Node] = []
+    params: list[int] = []
     while tokens[0].type != TokenType.RCURLY:
-      (tokens, param) = parse(tokens)
+      (tokens, param) = parse(tokens, ast)
       params.append(param)
+    if len(params) != arity:
+      raise TypeError("wrong number of parameters: " + fn_name)
     tokens = tokens[1:]
-    return (tokens, Node(NodeType.CALL, (fn_name, params)))
+    return (tokens, ast.emit(NodeType.CALL, fn=fn, params=params))
 
   raise SyntaxError("unexpected token: " + str(tok))
 
-# Functions
-functions: dict[str, Callable[[list[float]], float]] = {
-  "sqrt": lambda inp: math.sqrt(inp[0]),
-  "sin": lambda inp: math.sin(inp[0]),
-  "cos": lambda inp: math.cos(inp[0]),
-  "tan": lambda inp: math.tan(inp[0]),
-  "fact": lambda inp: math.gamma(inp[0]) * inp[0],
+# Evaluator
+# Lists the nodes under node (including it) children first, without recursing.
+# The children of folded nodes are skipped since they're no longer used
+def postorder(ast: Ast, node: int) -> list[int]:
+  order = []
+  pending = [node]
+  while len(pending) > 0:
+    node = pending.pop()
+    order.append(node)
+    type = ast.types[node]
+    if type == NodeType.EXPR:
+      pending.append(ast.lefts[node])
+      pending.append(ast.rights[node])
+    elif type == NodeType.CALL:
+      pending.extend(ast.params[node])
+  order.reverse()
+  return order
+
+def eval_node(ast: Ast, node: int, variables: dict[str, float]) -> float:
+  order = postorder(ast, node)
+  stack = [0.0] * len(order) # Can't get deeper than the number of nodes, so it never has to grow
+  sp = 0
+  for node in order:
+    type = ast.types[node]
+    if type == NodeType.NUMBER:
+      stack[sp] = ast.consts[node]
+      sp += 1
+    elif type == NodeType.VARIABLE:
+      stack[sp] = variables[ast.names[node]]
+      sp += 1
+    elif type == NodeType.EXPR:
+      sp -= 1
+      stack[sp - 1] = ast.ops[node](stack[sp - 1], stack[sp])
+    elif type == NodeType.CALL:
+      fn = ast.fns[node]
+      argc = len(ast.params[node])
+      if argc == 1:
+        stack[sp - 1] = fn(stack[sp - 1])
+      else:
+        start = sp - argc
+        stack[start] = fn(*stack[start:sp])
+        sp = start + 1
+    else:
+      raise ValueError("unknown node: " + str(node))
+  return stack[0]
+
+# Optimizer
+# Turns nodes that don't depend on a variable into the number they evaluate to.
+# Children come before their parents, so a single pass folds whole constant subtrees
+def fold(ast: Ast):
+  for node in range(len(ast.types)):
+    type = ast.types[node]
+    if type == NodeType.EXPR:
+      constant = ast.types[ast.lefts[node]] == NodeType.NUMBER and ast.types[ast.rights[node]] == NodeType.NUMBER
+    elif type == NodeType.CALL:
+      constant = all(ast.types[param] == NodeType.NUMBER for param in ast.params[node])
+    else:
+      continue
+
+    if constant:
+      try:
+        ast.consts[node] = eval_node(ast, node, {})
+        ast.types[node] = NodeType.NUMBER
+      except (ZeroDivisionError, ValueError):
+        pass # Not foldable, so leave it to fail when drawing
+
+# Compiler
+LOAD_CONST = 0
+LOAD_VAR = 1
+BINOP_ADD = 2
+BINOP_SUB = 3
+BINOP_MUL = 4
+BINOP_DIV = 5
+BINOP_POW = 6
+CALL_FN = 7
+
+binops: dict[Callable[[float, float], float], int] = {
+  operator.add: BINOP_ADD,
+  operator.sub: BINOP_SUB,
+  operator.mul: BINOP_MUL,
+  operator.truediv: BINOP_DIV,
+  operator.pow: BINOP_POW,
 }
 
-# Evaluator
-def eval_node(node: Node, variables: dict[str, float]) -> float:
-  if node.type == NodeType.NUMBER:
-    return node.value
-  elif node.type == NodeType.VARIABLE:
-    return variables[node.value]
-  elif node.type == NodeType.EXPR:
-    (op, left, right) = node.value
-    left = eval_node(left, variables)
-    right = eval_node(right, variables)
-    if op == "+":
-      return left + right
-    elif op == "-":
-      return left - right
-    elif op == "*":
-      return left * right
-    elif op == "/":
-      return left / right
-    elif op == "^":
-      return left ** right
+# Flattens the tree into postorder instructions, so it only has to be walked once per equation
+def compile_ast(ast: Ast, node: int, ops: list[int], args: list[Any], var_index: dict[str, int]):
+  for node in postorder(ast, node):
+    type = ast.types[node]
+    if type == NodeType.NUMBER:
+      ops.append(LOAD_CONST)
+      args.append(ast.consts[node])
+    elif type == NodeType.VARIABLE:
+      name = ast.names[node]
+      if name not in var_index:
+        raise NameError("unknown variable: " + name)
+      ops.append(LOAD_VAR)
+      args.append(var_index[name])
+    elif type == NodeType.EXPR:
+      ops.append(binops[ast.ops[node]])
+      args.append(None)
+    elif type == NodeType.CALL:
+      ops.append(CALL_FN)
+      args.append((ast.fns[node], len(ast.params[node])))
     else:
-      raise SyntaxError("unknown operator: " + op)
-  elif node.type == NodeType.CALL:
-    (fn_name, params) = node.value
-    if fn_name in functions:
-      return functions[fn_name]([eval_node(param, variables) for param in params])
+      raise ValueError("unknown node: " + str(node))
+
+# JIT
+jit_operators: dict[int, str] = {
+  BINOP_ADD: "+",
+  BINOP_SUB: "-",
+  BINOP_MUL: "*",
+  BINOP_DIV: "/",
+  BINOP_POW: "**",
+}
+
+# Generates one Python function that loops over the columns and runs the program as straight-line code,
+# keeping each stack slot in a local variable so no instructions are dispatched while drawing.
+# It first tries the whole program as one expression in a list comprehension, which avoids the
+# per-column indexing, and only falls back to the loop when a column fails
+def jit(ops: list[int], args: list[Any]) -> Callable[[list[list[float]]], list[float]]:
+  setup = []
+  loads = []
+  loaded = set()
+  body = []
+  stack = []
+  exprs = [] # The same stack as nested expressions, with how deeply each is nested
+  for pc in range(len(ops)):
+    op = ops[pc]
+    if op == LOAD_CONST:
+      setup.append("  c%d = args[%d]" % (pc, pc))
+      stack.append("c%d" % pc)
+      exprs.append(("c%d" % pc, 0))
+    elif op == LOAD_VAR:
+      var = args[pc]
+      if var not in loaded:
+        loaded.add(var)
+        setup.append("  xs%d = variables[%d]" % (var, var))
+        loads.append("      v%d = xs%d[i]" % (var, var))
+      stack.append("v%d" % var)
+      exprs.append(("v%d" % var, 0))
+    elif op == CALL_FN:
+      argc = args[pc][1]
+      start = len(stack) - argc
+      params = stack[start:]
+      del stack[start:]
+      setup.append("  f%d = args[%d][0]" % (pc, pc))
+      body.append("      s%d = f%d(%s)" % (start, pc, ", ".join(params)))
+      stack.append("s%d" % start)
+      param_exprs = exprs[start:]
+      del exprs[start:]
+      depth = max([param[1] for param in param_exprs], default=0) + 1
+      exprs.append(("f%d(%s)" % (pc, ", ".join(param[0] for param in param_exprs)), depth))
     else:
-      raise NameError("unknown function: " + fn_name)
-  else:
-    raise ValueError("unknown node: " + str(node))
+      right = stack.pop()
+      left = stack.pop()
+      body.append("      s%d = %s %s %s" % (len(stack), left, jit_operators[op], right))
+      stack.append("s%d" % len(stack))
+      right = exprs.pop()
+      left = exprs.pop()
+      exprs.append(("(%s %s %s)" % (left[0], jit_operators[op], right[0]), max(left[1], right[1]) + 1))
+
+  source = "def run(variables):\n"
+  source += "".join(line + "\n" for line in setup)
+  (expr, depth) = exprs[-1]
+  if depth < 100: # Python can't compile very deeply nested expressions
+    used = sorted(loaded)
+    if len(used) == 0:
+      columns = "_ in variables[0]"
+    elif len(used) == 1:
+      columns = "v%d in xs%d" % (used[0], used[0])
+    else:
+      columns = "(%s) in zip(%s)" % (", ".join("v%d" % var for var in used), ", ".join("xs%d" % var for var in used))
+    source += "  try:\n"
+    source += "    return [%s for %s]\n" % (expr, columns)
+    source += "  except (ZeroDivisionError, ValueError):\n"
+    source += "    pass\n"
+  source += "  ys = [nan] * len(variables[0])\n"
+  source += "  for i in range(len(ys)):\n"
+  source += "    try:\n"
+  source += "".join(line + "\n" for line in loads + body)
+  source += "      ys[i] = %s\n" % stack[-1]
+  source += "    except (ZeroDivisionError, ValueError):\n"
+  source += "      pass\n" # Left as NaN so the graph has a gap there
+  source += "  return ys\n"
+
+  scope = {"args": args, "nan": math.nan}
+  exec(compile(source, "<equation>", "exec"), scope)
+  return scope["run"]
 
 # Parse
 src = input("Enter an equation (must be in parenthesis): ")
-(_, eq) = parse(tokenize(src))
+tree = Ast()
+(_, root) = parse(tokenize(src), tree)
+fold(tree)
+ops: list[int] = []
+args: list[Any] = []
+compile_ast(tree, root, ops, args, {"x": 0})
+evaluate = jit(ops, args)
 
 # Graph
 import pygame
@@ -219,70 +402,127 @@ def screenx_to_coord(x: float) -> float:
 def screeny_to_coord(y: float) -> float:
   return -((y - offy) / scale) # Opposite of above steps for y
 
+# screenx_to_coord for every column from first up to last, without a call per column
+def screenxs_to_coords(first: int, last: int) -> list[float]:
+  (o, s) = (offx, scale)
+  return [(x - o) / s for x in range(first, last)]
+
+# Tick labels only change when they scroll into view, so keep the rendered text around
+label_cache: dict[int, pygame.Surface] = {}
+
+def label(i: int) -> pygame.Surface:
+  text = label_cache.get(i)
+  if text is None:
+    if len(label_cache) > 1000: # Don't grow forever while panning
+      label_cache.clear()
+    text = font.render(str(i), True, (0, 0, 0))
+    label_cache[i] = text
+  return text
+
 # Draw func
-def draw():
+# Paints the view, only touching pixels inside area
+def paint(area: pygame.Rect):
+  win.set_clip(area)
   win.fill((255, 255, 255))
 
   # Draw axes
   pygame.draw.line(win, (0, 0, 0), (0, offy), (WIDTH, offy), width=2)
   pygame.draw.line(win, (0, 0, 0), (offx, 0), (offx, HEIGHT), width=2)
 
+  # Each axis' ticks are one polyline, it runs back along the axis between ticks so the joins stay hidden
   offamount = 10
 
   # X-Axis
+  ticks = []
   numticks = int(WIDTH / scale)
   incr = math.floor(numticks / 20) # 20 ticks at once
   if incr < 1:
     incr = 1
-  left = math.ceil(screenx_to_coord(0))
-  for i in range(left, left + numticks + 1, incr):
+  # Multiples of incr, so ticks don't move around while panning. Includes one tick past each edge since its
+  # label still reaches into view, and a scrolled frame won't have drawn it
+  left = (math.ceil(screenx_to_coord(0) / incr) - 1) * incr
+  right = (math.floor(screenx_to_coord(WIDTH) / incr) + 1) * incr
+  for i in range(left, right + 1, incr):
     x = i
     y = 0
     (x, y) = coord_to_screen(x, y)
-    pygame.draw.line(win, (0, 0, 0), (x, y - offamount), (x, y + offamount), width=1)
-    text = font.render(str(int(i)), True, (0, 0, 0))
+    ticks += [(x, y), (x, y - offamount), (x, y + offamount), (x, y)]
+    text = label(int(i))
     win.blit(text, (x - text.get_width() / 2, offy - offamount * 2 - 10))
+  pygame.draw.lines(win, (0, 0, 0), False, ticks, width=1)
 
   # Y-Axis
+  ticks = []
   numticks = int(HEIGHT / scale)
   incr = math.floor(numticks / 20) # 20 ticks at once
   if incr < 1:
     incr = 1
-  top = math.floor(screeny_to_coord(HEIGHT))
-  for i in range(top, top + numticks + 1, incr):
+  top = (math.floor(screeny_to_coord(HEIGHT) / incr) - 1) * incr
+  end = (math.ceil(screeny_to_coord(0) / incr) + 1) * incr
+  for i in range(top, end + 1, incr):
     x = 0
     y = i
     (x, y) = coord_to_screen(x, y)
-    pygame.draw.line(win, (0, 0, 0), (x - offamount, y), (x + offamount, y), width=1)
-    text = font.render(str(int(i)), True, (0, 0, 0))
+    ticks += [(x, y), (x - offamount, y), (x + offamount, y), (x, y)]
+    text = label(int(i))
     win.blit(text, (offx - offamount * 2 - 10, y - text.get_height() / 2))
+  pygame.draw.lines(win, (0, 0, 0), False, ticks, width=1)
+
+  # Draw function, with a column either side of the area so lines crossing its edges are included
+  (o, s) = (offy, scale) # A column's screen x is its index, so only y needs converting
+  segments = [[]] # Runs of columns where the function is defined
+  for x in range(max(area.left - 1, 0), min(area.right + 1, WIDTH)):
+    yv = ys[x]
+    if math.isfinite(yv):
+      segments[-1].append((x, o - yv * s))
+    elif len(segments[-1]) > 0:
+      segments.append([])
+  for segment in segments:
+    if len(segment) > 1: # A lone point has nothing to connect to
+      pygame.draw.lines(win, (255, 0, 0), False, segment, width=2)
+
+  win.set_clip(None)
+
+# What's currently on screen, so panning by whole pixels can reuse the last frame
+drawn_offx = 0.0
+drawn_offy = 0.0
+drawn_scale = 0.0 # Nothing drawn yet
+ys: list[float] = [] # Value of the function at each column, NaN where it isn't defined
 
-  # Draw function
-  prevxv = 0
-  prevyv = 0
-  noprev = True
-  for x in range(0, WIDTH):
-    xv = screenx_to_coord(x)
-    try:
-      yv = eval_node(eq, {"x": xv})
-    except (ZeroDivisionError, ValueError):
-      noprev = True
-      continue
-    
-    if noprev:
-      prevxv = xv
-      prevyv = yv
-      noprev = False
-    else:
-      (x, y) = coord_to_screen(xv, yv) # Pixel by pixel eval func
-      (prevx, prevy) = coord_to_screen(prevxv, prevyv) # Pixel by pixel eval func
-      pygame.draw.line(win, (255, 0, 0), (prevx, prevy), (x, y), width=2)
-      prevxv = xv
-      prevyv = yv
+def draw():
+  global ys, drawn_offx, drawn_offy, drawn_scale
+  dx = offx - drawn_offx
+  dy = offy - drawn_offy
+  if scale == drawn_scale and dx == int(dx) and dy == int(dy) and abs(dx) < WIDTH and abs(dy) < HEIGHT:
+    # Scroll the last frame and only paint and evaluate what came into view
+    dx = int(dx)
+    dy = int(dy)
+    win.scroll(dx, dy)
+    areas = []
+    if dx > 0:
+      areas.append(pygame.Rect(0, 0, dx, HEIGHT))
+      ys = evaluate([screenxs_to_coords(0, dx)]) + ys[:WIDTH - dx]
+    elif dx < 0:
+      areas.append(pygame.Rect(WIDTH + dx, 0, -dx, HEIGHT))
+      ys = ys[-dx:] + evaluate([screenxs_to_coords(WIDTH + dx, WIDTH)])
+    if dy > 0:
+      areas.append(pygame.Rect(0, 0, WIDTH, dy))
+    elif dy < 0:
+      areas.append(pygame.Rect(0, HEIGHT + dy, WIDTH, -dy))
+  else:
+    areas = [win.get_rect()]
+    ys = evaluate([screenxs_to_coords(0, WIDTH)])
+
+  for area in areas:
+    paint(area)
+  drawn_offx = offx
+  drawn_offy = offy
+  drawn_scale = scale
 
   pygame.display.update()
 
 # Main loop
+clock = pygame.time.Clock()
 running = True
 draw()
 while running:
@@ -299,6 +539,12 @@ while running:
     speed = 6
     speedscale = 1.1
 
+  # Scale movement by how long the last frame took (16ms at 60fps), so it doesn't depend on the frame rate.
+  # Panning stays in whole pixels so draw() can scroll the last frame
+  frames = clock.get_time() / 16
+  speed = round(speed * frames)
+  speedscale = speedscale ** frames
+
   if keys[pygame.K_LEFT]:
     offx += speed
     changed = True
@@ -324,8 +570,9 @@ while running:
     scale = WIDTH / 20
     offx = WIDTH / 2
     offy = HEIGHT / 2
-    draw()
+    changed = True
   
   if changed:
     draw()
+  clock.tick(60)
 